@@ -195,13 +195,14 @@ def _compute_poll_list(poll_queue):
     poll_list = []
     new_poll_queue = {}
     for file, pollers in poll_queue.items():
-        active = [poller
-            for poller in pollers
-            if not poller.wakeup.woken()]
-        if active:
-            event_mask = 0
-            for poller in active:
+        # Filter out woken pollers and accumulate the event mask in one pass.
+        active = []
+        event_mask = 0
+        for poller in pollers:
+            if not poller.wakeup.woken():
+                active.append(poller)
                 event_mask |= poller.events[file]
+        if active:
             poll_list.append((file, event_mask))
             new_poll_queue[file] = active
     return poll_list, new_poll_queue
@@ -210,6 +211,12 @@ def _compute_poll_list(poll_queue):
 class _Poller(object):
     '''Wrapper for handling poll wakeup.'''
 
+    __slots__ = [
+        'events',           # Dictionary of descriptors and event masks
+        'wakeup',           # Wakeup object, assigned by the scheduler
+        '__ready_list',     # Dictionary of ready descriptors and events
+    ]
+
     def __init__(self, event_list):
         # .events is a dictionary mapping each descriptor we're interested in
         # to the bit mask of interesting events.
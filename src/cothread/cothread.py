@@ -69,7 +69,8 @@ Similarly the EventQueue can be used for communication.
 import sys
 import os
 import time
-import bisect
+import heapq
+import itertools
 import traceback
 import collections
 import threading
@@ -118,67 +119,94 @@ __all__ = [
 class _TimerQueue(object):
     '''A timer queue: objects are held on the queue in timeout sequence.'''
 
-    # The queue is implemented using the bisect function to insert objects
-    # into the queue without having to resort the list.  This is cheap and
-    # cheerful to implement and runs fast enough.
+    # The queue is implemented as a binary heap of (timeout, count, wakeup)
+    # entries.  The unique count ensures that entries with equal timeouts are
+    # kept in insertion order and that wakeups are never compared.  Entries
+    # which have already expired when they are added are kept on a separate
+    # list, as they will all be taken off again on the next tick.
 
     def __init__(self):
-        # We maintain the list of timeouts and the associated tasks separately
-        # so that bisect searching can safely search the timeouts list without
-        # trying to compare wakeups.
-        self.__timeouts = []
-        self.__wakeups = []
+        self.__heap = []
+        self.__expired = []
+        self.__count = itertools.count()
         self.__garbage = 0
 
     def put(self, task, timeout):
         '''Adds value to the queue with the specified timeout.'''
-        index = bisect.bisect(self.__timeouts, timeout)
-        self.__timeouts.insert(index, timeout)
-        self.__wakeups.insert(index, task)
+        heapq.heappush(self.__heap, (timeout, next(self.__count), task))
+
+    def put_expired(self, task, timeout):
+        '''Adds value to the queue with a timeout which has already passed.
+        This is woken by the next call to wake_expired() in the same order as
+        if it had been added with put(), but bypasses the heap.'''
+        self.__expired.append((timeout, next(self.__count), task))
 
     def timeout(self):
-        '''Returns the timeout of the queue.  Only valid if queue not empty.'''
-        return self.__timeouts[0]
+        '''Returns the timeout of the first live entry on the queue, or None if
+        there is nothing left to wait for.  Cancelled entries at the head of
+        the queue are discarded here, otherwise they would cause the scheduler
+        to wake up for nothing.'''
+        heap = self.__heap
+        while heap and heap[0][2].woken():
+            heapq.heappop(heap)
+            self.__garbage -= 1
+        if heap:
+            return heap[0][0]
+        else:
+            return None
 
-    def wake_expired(self):
-        index = bisect.bisect_right(self.__timeouts, time.time())
-        expired = self.__wakeups[:index]
-        del self.__timeouts[:index]
-        del self.__wakeups[:index]
+    def has_expired(self):
+        '''Returns True if there are entries from put_expired() waiting to
+        be woken on the next tick.'''
+        return bool(self.__expired)
 
-        for task in expired:
+    def wake_expired(self):
+        # Take all the expired entries off the queue before waking any of
+        # them, as the wakeups can modify the queue.
+        heap = self.__heap
+        expired = self.__expired
+        if not expired and (not heap or heap[0][0] > time.time()):
+            # The common case: nothing has expired yet.
+            return
+
+        self.__expired = []
+        now = time.time()
+        while heap and heap[0][0] <= now:
+            expired.append(heapq.heappop(heap))
+        # Entries added by put_expired() have to be merged into timeout order
+        # with the rest; if there are none this list is already in order.
+        expired.sort()
+
+        for _, _, task in expired:
             if not task.wakeup(_WAKEUP_TIMEOUT):
                 self.__garbage -= 1
         assert 0 <= self.__garbage <= len(self)
 
     def __len__(self):
         '''Returns the number of entries on the queue.'''
-        return len(self.__timeouts)
+        return len(self.__heap) + len(self.__expired)
 
     def cancel(self):
         '''This is called to cancel a timeout.  We add this to our garbage
         count, triggering a garbage collect if appropriate.'''
         self.__garbage += 1
         if 2 * self.__garbage > len(self):
-            timeouts = []
-            wakeups = []
-            for timeout, task in zip(self.__timeouts, self.__wakeups):
-                if not task.woken():
-                    timeouts.append(timeout)
-                    wakeups.append(task)
-            self.__timeouts = timeouts
-            self.__wakeups = wakeups
+            heap = [entry for entry in self.__heap if not entry[2].woken()]
+            heapq.heapify(heap)
+            self.__heap = heap
+            self.__expired = [
+                entry for entry in self.__expired if not entry[2].woken()]
             self.__garbage = 0
 
 
 class _WakeupQueue(object):
     __slots__ = [
-        '__waiters',        # List of wakeup objects pending wakeup
+        '__waiters',        # Queue of wakeup objects pending wakeup
         '__garbage',        # Count of expired wakeup objects
     ]
 
     def __init__(self):
-        self.__waiters = []
+        self.__waiters = collections.deque()
         # Every time a timeout occurs a waiter is left behind on the timer
         # queue.  We keep count of these as "garbage", and at the appropriate
         # time we can garbage collect the queue.
@@ -193,19 +221,20 @@ class _WakeupQueue(object):
     def wake(self, wake_all):
         if self.__waiters:
             if wake_all:
-                for task in self.__waiters:
-                    task.wakeup(_WAKEUP_NORMAL)
-                self.__waiters = []
+                waiters = self.__waiters
+                self.__waiters = collections.deque()
                 self.__garbage = 0
+                for task in waiters:
+                    task.wakeup(_WAKEUP_NORMAL)
             else:
-                # Wake the first task that actually wakes, mark the rest as
-                # junk.
-                for n, task in enumerate(self.__waiters):
-                    if task.wakeup(_WAKEUP_NORMAL):
+                # Wake the first task that actually wakes, discarding any junk
+                # ahead of it.
+                waiters = self.__waiters
+                while waiters:
+                    if waiters.popleft().wakeup(_WAKEUP_NORMAL):
                         break
                     else:
                         self.__garbage -= 1
-                del self.__waiters[:n+1]
         assert 0 <= self.__garbage <= len(self)
 
     def cancel(self):
@@ -215,9 +244,9 @@ class _WakeupQueue(object):
         # keep only those waiters which haven't been woken yet.
         self.__garbage += 1
         if 2 * self.__garbage > len(self):
-            self.__waiters = [task
+            self.__waiters = collections.deque(task
                 for task in self.__waiters
-                if not task.woken()]
+                if not task.woken())
             self.__garbage = 0
 
 
@@ -268,6 +297,47 @@ class _Wakeup(object):
         return self.__task is None
 
 
+class _TimerCallback(object):
+    '''A _TimerCallback is placed on the timer queue in place of a _Wakeup
+    when a function is to be called when a deadline expires.  The callback is
+    called at most once, directly from the scheduler, so must not block.'''
+
+    __slots__ = [
+        '__callback',       # Function to call on timeout
+        '__timers',         # Timeout queue for this callback
+    ]
+
+    def __init__(self, callback, timers):
+        self.__callback = callback
+        self.__timers = timers
+
+    def wakeup(self, reason):
+        callback = self.__callback
+        if callback:
+            self.__callback = None
+            if reason == _WAKEUP_TIMEOUT:
+                # We're running in the scheduler here, so we can't allow any
+                # exception to escape.
+                try:
+                    callback()
+                except:
+                    sys.stderr.write(
+                        'Timer callback raised uncaught exception\n' +
+                        traceback.format_exc())
+            else:
+                self.__timers.cancel()
+            return True
+        else:
+            return False
+
+    def woken(self):
+        return self.__callback is None
+
+    def cancel(self):
+        '''Ensures that the callback will not be called.'''
+        self.wakeup(_WAKEUP_NORMAL)
+
+
 # Task wakeup reasons
 _WAKEUP_NORMAL = 0     # Normal wakeup
 _WAKEUP_TIMEOUT = 1    # Wakeup on timeout
@@ -332,8 +402,10 @@ class _Scheduler(object):
                 _coroutine.switch(main_task, sys.exc_info())
 
     def __init__(self):
-        # List of all tasks that are currently ready to be dispatched.
-        self.__ready_queue = []
+        # Queue of all tasks that are currently ready to be dispatched, and a
+        # spare queue to swap in while the ready queue is being dispatched.
+        self.__ready_queue = collections.deque()
+        self.__spare_queue = collections.deque()
         # List of tasks waiting for ready_queue to become empty
         self.__yield_queue = _WakeupQueue()
         # List of tasks waiting for a timeout
@@ -349,6 +421,10 @@ class _Scheduler(object):
         self.__poll_queue = {}
         # By default use blocking poll while waiting for the next event.
         self._poll_block = coselect.poll_block
+        # Every suspend creates a _Wakeup which needs our __wakeup_task method.
+        # Bind it once here rather than creating a fresh bound method object
+        # on every suspend.
+        self.__wakeup_action = self.__wakeup_task
 
 
     def __tick(self):
@@ -369,29 +445,45 @@ class _Scheduler(object):
         # (typically either a voluntary suspend, or a successful wait for an
         # event).
         ready_queue = self.__ready_queue
-        self.__ready_queue = []
-        for task, reason in ready_queue:
-            _coroutine.switch(task, reason)
+        self.__ready_queue = self.__spare_queue
+        switch = _coroutine.switch
+        try:
+            for task, reason in ready_queue:
+                switch(task, reason)
+        finally:
+            # If dispatch is interrupted the rest of this batch is discarded,
+            # as it always has been.  Either way the emptied queue becomes
+            # the spare for the next tick.
+            ready_queue.clear()
+            self.__spare_queue = ready_queue
 
     def __schedule_loop(self):
         '''This runs a scheduler loop without returning.'''
+        # Bind everything we can ahead of the loop.  The ready queue is
+        # replaced on every tick so has to be looked up afresh each time.
+        tick = self.__tick
+        yield_queue = self.__yield_queue
+        timer_queue = self.__timer_queue
         while True:
             # Dispatch all waiting tasks
-            self.__tick()
+            tick()
 
             # Now see how long we have to wait for the next tick
-            if self.__ready_queue or self.__yield_queue:
+            if self.__ready_queue or yield_queue or \
+                    timer_queue.has_expired():
                 # There are ready tasks: don't wait
                 delay = 0
-            elif self.__timer_queue:
-                # There are timers waiting to fire: wait for the first one.  We
-                # don't sleep for less than 1ms: there's not a lot of point in a
-                # shorter timeout, and this works around some timer calculation
-                # quirks.
-                delay = max(self.__timer_queue.timeout() - time.time(), 0.001)
             else:
-                # Nothing to do: block until something external happens.
-                delay = None
+                timeout = timer_queue.timeout()
+                if timeout is None:
+                    # Nothing to do: block until something external happens.
+                    delay = None
+                else:
+                    # There are timers waiting to fire: wait for the first
+                    # one.  We don't sleep for less than 1ms: there's not a lot
+                    # of point in a shorter timeout, and this works around some
+                    # timer calculation quirks.
+                    delay = max(timeout - time.time(), 0.001)
 
             # Finally suspend until something is ready.
             self.__wakeup_poll(self.__poll_suspend(delay))
@@ -401,14 +493,19 @@ class _Scheduler(object):
         reached.  Returns lists of ready file descriptors and events.'''
         poll_list, self.__poll_queue = \
             coselect._compute_poll_list(self.__poll_queue)
-        if self.__poll_callback is None:
+        poll_callback = self.__poll_callback
+        if poll_callback is None:
+            if delay == 0 and not poll_list:
+                # Nothing to wait for and nothing to poll, so don't bother
+                # making the system call.
+                return []
             # If we're not being polled from outside, run our own poll.
             return self._poll_block(poll_list, delay)
         else:
             # If the scheduler loop was invoked from outside then return
             # control back to the caller: it will provide the select
             # operation we need.
-            return self.__poll_callback.switch(poll_list, delay)
+            return poll_callback.switch(poll_list, delay)
 
     def poll_scheduler(self, ready_list):
         '''This is called when the scheduler needs to be controlled from
@@ -449,7 +546,13 @@ class _Scheduler(object):
     def do_yield(self, until):
         '''Hands control to the next task with work to do, will return as
         soon as there is time.'''
-        self.wait_until(until, self.__yield_queue, None)
+        if until is not None and until <= time.time():
+            # The deadline has already passed, typically Yield(0), so we'll be
+            # woken on the very next tick whatever else happens.  Skip the
+            # yield queue.
+            return self.__wait_expired(until)
+        else:
+            return self.wait_until(until, self.__yield_queue, None)
 
     def wait_until(self, until, suspend_queue, wakeup):
         '''The calling task is suspended.  If a deadline is given then the
@@ -472,7 +575,27 @@ class _Scheduler(object):
         if until is not None:
             self.__timer_queue.put(wakeup, until)
 
-        # Suspend until we're woken.
+        return self.__suspend(wakeup)
+
+    def sleep_until(self, until):
+        '''Specialisation of wait_until(until, None, None) for the common
+        case of simply sleeping until a deadline.  Returns True iff the
+        wakeup is from a timeout, which is always the case unless the
+        scheduler is shutting down.'''
+        if until is None:
+            return self.wait_until(None, None, None)
+        elif until <= time.time():
+            return self.__wait_expired(until)
+
+        # Only the timer queue can wake us, so no suspend queue to manage.
+        wakeup = _Wakeup(self.__wakeup_action, None, self.__timer_queue)
+        self.__timer_queue.put(wakeup, until)
+        return self.__suspend(wakeup)
+
+    def __suspend(self, wakeup):
+        '''Suspends the calling task until it is woken through the given
+        wakeup, which the caller must already have queued.  Returns True iff
+        the wakeup is from a timeout.'''
         # Normally this call will return control to __tick(), but there are
         # two other cases to consider.  On the very first suspend control is
         # returned to the top of __scheduler(), and more interestingly, on
@@ -489,6 +612,23 @@ class _Scheduler(object):
         else:
             return result == _WAKEUP_TIMEOUT
 
+    def __wait_expired(self, until):
+        '''Suspends the calling task for a single round of scheduling.  This
+        is used in place of wait_until() when the deadline has already expired
+        and there is no other reason to wait.  The task is woken on the next
+        tick together with any other expired timers, in deadline order.'''
+        wakeup = _Wakeup(self.__wakeup_action, None, self.__timer_queue)
+        self.__timer_queue.put_expired(wakeup, until)
+        return self.__suspend(wakeup)
+
+    def schedule_callback(self, until, callback):
+        '''Arranges for callback() to be called from the scheduler once the
+        given deadline has passed.  The callback is called without switching
+        tasks, so must not block.  Returns a handle with a cancel() method.'''
+        handle = _TimerCallback(callback, self.__timer_queue)
+        self.__timer_queue.put(handle, until)
+        return handle
+
     def poll_until(self, poller, until):
         '''Cooperative poll: the calling task is suspended until one of
         the specified waitable objects becomes ready or the timeout expires.
@@ -507,9 +647,9 @@ class _Scheduler(object):
 
     def __Wakeup(self, queue, until):
         if until is None:
-            return _Wakeup(self.__wakeup_task, queue, None)
+            return _Wakeup(self.__wakeup_action, queue, None)
         else:
-            return _Wakeup(self.__wakeup_task, queue, self.__timer_queue)
+            return _Wakeup(self.__wakeup_action, queue, self.__timer_queue)
 
     def __wakeup_task(self, task, reason):
         if not isinstance(reason, tuple):
@@ -594,13 +734,14 @@ class EventBase(object):
         # simulated.
         self.__wait_abort = 0
 
-    def _WaitUntil(self, timeout):
+    def _WaitUntil(self, deadline):
         '''Suspends the calling task until _Wakeup() is called.  Raises an
-        exception if a timeout occurs first.'''
+        exception if the deadline, as returned by GetDeadline(), passes
+        first.'''
         # If the event object is not ready we always yield control to ensure
         # that other ready cothreads get the opportunity to run.
         _validate_thread()
-        if _scheduler.wait_until(GetDeadline(timeout), self.__wait_queue, None):
+        if _scheduler.wait_until(deadline, self.__wait_queue, None):
             raise Timedout('Timed out waiting for event')
 
     def _Wakeup(self, wake_all):
@@ -638,7 +779,8 @@ class Spawn(EventBase):
     # Set of all active processes for debugging
     Cothreads = set()
 
-    def __init__(self, function, *args, **kargs):
+    def __init__(self, function, *args,
+            raise_on_wait = False, stack_size = 0, **kargs):
         '''The given function and arguments will be called as a new task.
         All of the arguments will be be passed through to function, except for
         the special keyword raise_on_wait which defaults to False.
@@ -651,10 +793,10 @@ class Spawn(EventBase):
         self.__args = args
         self.__kargs = kargs
         self.__result = ()
-        self.__raise_on_wait = kargs.pop('raise_on_wait', False)
+        self.__raise_on_wait = raise_on_wait
         # Hand control over to the run method in the scheduler.
         _validate_thread()
-        _scheduler.spawn(self.__run, kargs.pop('stack_size', 0))
+        _scheduler.spawn(self.__run, stack_size)
         self.Cothreads.add(self)
 
     def __run(self, _):
@@ -662,20 +804,22 @@ class Spawn(EventBase):
             # Try for normal successful result.
             self.__result = (True,
                 self.__function(*self.__args, **self.__kargs))
-        except:
+        except BaseException as exception:
             # Oops: the task terminated with an exception.
             if self.__raise_on_wait:
                 # The creator of the task is willing to catch this exception,
-                # so hang onto it now until Wait() is called.
-                self.__result = (False, sys.exc_info())
+                # so hang onto it now until Wait() is called.  The exception
+                # carries its own traceback.
+                self.__result = (False, exception)
             else:
                 # No good.  We can't allow this exception to propagate, as
                 # doing so will kill the scheduler.  Instead report the
-                # traceback right here.
-                print('Spawned task',
-                    getattr(self.__function, '__name__', '(unknown)'),
-                    'raised uncaught exception', file = sys.stderr)
-                traceback.print_exc()
+                # traceback right here, formatted up front so that it goes
+                # out as a single write.
+                sys.stderr.write(
+                    'Spawned task %s raised uncaught exception\n%s' % (
+                        getattr(self.__function, '__name__', '(unknown)'),
+                        traceback.format_exc()))
                 self.__result = (True, None)
         if not self._Wakeup(False):
             # Aborted wakeup: consume the result now, will cause a subsequent
@@ -696,7 +840,7 @@ class Spawn(EventBase):
         task terminated with an exception and raise_on_wait was selected.
         Can only be called once, as the result is deleted after call.'''
         if not self.__result:
-            self._WaitUntil(timeout)
+            self._WaitUntil(GetDeadline(timeout))
         ok, result = self.__result
         if ok:
             return result
@@ -704,7 +848,7 @@ class Spawn(EventBase):
             try:
                 # Re-raise the exception that actually killed the task here
                 # where it can be received by whoever waits on the task.
-                raise result[1].with_traceback(result[2])
+                raise result
             finally:
                 # In this case result and self.__result contain a traceback.  To
                 # avoid circular references which will delay garbage collection,
@@ -729,8 +873,11 @@ class Event(EventBase):
     can also be associated with the event.'''
 
     __slots__ = [
-        '__value',          # Value on this event
+        '__signalled',      # Whether the event is signalled
+        '__ok',             # Set unless signalled with an exception
+        '__result',         # Value or exception on this event
         '__auto_reset',     # Whether value is consumed when taken
+        '__wake_all',       # Whether to wake all waiters, not auto_reset
     ]
 
     def __init__(self, auto_reset = True):
@@ -742,12 +889,15 @@ class Event(EventBase):
         signalling a process: if auto_reset=True is specified then only one
         task at a time sees any individual signal on this object.'''
         EventBase.__init__(self)
-        self.__value = ()
+        self.__signalled = False
+        self.__ok = True
+        self.__result = None
         self.__auto_reset = auto_reset
+        self.__wake_all = not auto_reset
 
     def __bool__(self):
         '''Tests whether the event is signalled.'''
-        return bool(self.__value)
+        return self.__signalled
     __nonzero__ = __bool__
 
     def Wait(self, timeout = None):
@@ -756,16 +906,18 @@ class Event(EventBase):
         raised if a timeout occurs.'''
         # If one task resets the event while another is waiting the wait may
         # fail, so we have to loop here.
-        deadline = AbsTimeout(timeout)
-        while not self.__value:
+        deadline = GetDeadline(timeout)
+        while not self.__signalled:
             self._WaitUntil(deadline)
 
-        ok, result = self.__value
+        ok = self.__ok
+        result = self.__result
         if self.__auto_reset:
             # If this is an auto reset event then we reset it on exit;
             # this means that we're the only thread that sees it being
             # signalled.
-            self.__value = ()
+            self.__signalled = False
+            self.__result = None
 
         # Finally return the result as a value or raise an exception.
         if ok:
@@ -780,27 +932,32 @@ class Event(EventBase):
         # difference.  Otherwise we either consume the value now or on the
         # next wakeup.
         if self.__auto_reset:
-            if self.__value:
+            if self.__signalled:
                 self.Reset()
             else:
                 self._AbortWait()
 
     def Signal(self, value = None):
         '''Signals the event.  Any waiting tasks are scheduled to be woken.'''
-        self.__value = (True, value)
-        if not self._Wakeup(not self.__auto_reset):
+        self.__signalled = True
+        self.__ok = True
+        self.__result = value
+        if not self._Wakeup(self.__wake_all):
             self.Reset()
 
     def SignalException(self, exception):
         '''Signals the event with an exception: the next call to wait will
         receive an exception instead of a normal return value.'''
-        self.__value = (False, exception)
-        if not self._Wakeup(not self.__auto_reset):
+        self.__signalled = True
+        self.__ok = False
+        self.__result = exception
+        if not self._Wakeup(self.__wake_all):
             self.Reset()
 
     def Reset(self):
         '''Resets the event (and erases the value).'''
-        self.__value = ()
+        self.__signalled = False
+        self.__result = None
 
 
 class Pulse(EventBase):
@@ -808,8 +965,10 @@ class Pulse(EventBase):
     will be woken by calling the Signal() method, but there is no state and
     nothing is returned from Wait().'''
 
+    __slots__ = []
+
     def Wait(self, timeout = None):
-        self._WaitUntil(timeout)
+        self._WaitUntil(GetDeadline(timeout))
 
     def Signal(self, wake_all = True):
         self._Wakeup(wake_all)
@@ -828,7 +987,7 @@ class EventQueue(EventBase):
 
     def __init__(self, max_length = None):
         EventBase.__init__(self)
-        self.__queue = []
+        self.__queue = collections.deque()
         self.__closed = False
         self.__max_length = max_length
 
@@ -839,11 +998,11 @@ class EventQueue(EventBase):
     def Wait(self, timeout = None):
         '''Returns the next object from the queue, or raises a Timeout
         exception if the timeout expires first.'''
-        deadline = AbsTimeout(timeout)
+        deadline = GetDeadline(timeout)
         while not self.__queue and not self.__closed:
             self._WaitUntil(deadline)
         if self.__queue:
-            return self.__queue.pop(0)
+            return self.__queue.popleft()
         else:
             raise StopIteration
 
@@ -851,7 +1010,7 @@ class EventQueue(EventBase):
         '''Called instead of performing a proper wait to release any resources
         that might be consumed until the wait occurs.'''
         if self.__queue:
-            self.__queue.pop(0)
+            self.__queue.popleft()
         elif not self.__closed:
             self._AbortWait()
 
@@ -861,14 +1020,14 @@ class EventQueue(EventBase):
         if self.__max_length is None or len(self) < self.__max_length:
             self.__queue.append(value)
             if not self._Wakeup(False):
-                self.__queue.pop(0)
+                self.__queue.popleft()
             return True
         else:
             return False
 
     def Reset(self):
         '''Discards all values in queue.'''
-        self.__queue = []
+        self.__queue.clear()
 
     def close(self):
         '''An event queue can be closed.  This will cause waiting to raise
@@ -963,9 +1122,9 @@ class _Callback:
                 try:
                     action(*args)
                 except:
-                    print('Asynchronous callback raised uncaught exception',
-                        file = sys.stderr)
-                    traceback.print_exc()
+                    sys.stderr.write(
+                        'Asynchronous callback raised uncaught exception\n' +
+                        traceback.format_exc())
             action = args = None
 
     def __call__(self, action, *args):
@@ -1026,8 +1185,8 @@ class Timer(object):
         '__callback',       # Function to call when timer fires
         '__retrigger',      # Enables retriggering timers
         '__reuse',          # Set if timer can be reused
-        '__control',        # Event object for controlling timer
-        '__fire',           # Controls action when event timeout occurs
+        '__stack_size',     # Stack size for running callback
+        '__pending',        # Scheduler callback for timer, if armed
     ]
 
     def __init__(self, timeout, callback,
@@ -1041,36 +1200,52 @@ class Timer(object):
         self.__callback = callback
         self.__retrigger = retrigger        # Auto retrigger on each timeout
         self.__reuse = reuse or retrigger   # Keep timer alive
-        self.__control = Event()            # Used to control main loop
-        self.__fire = True                  # False if control event pending
-        Spawn(self.__timer, stack_size = stack_size)
-
-    def __timer(self):
-        running = True
-        while running:
-            try:
-                self.__control.Wait(self.__timeout)
-            except Timedout:
-                if self.__fire:
-                    if not self.__retrigger:
-                        # Unless we're automatically retriggering, any new
-                        # timeout has to be specified anew.
-                        self.__timeout = None
-                    self.__callback()
+        self.__stack_size = stack_size
+        self.__pending = None
+        self.__arm()
+
+    def __arm(self):
+        # Cancels any pending timeout and starts the timer again with the
+        # current timeout.  Rather than dedicating a waiting cothread to each
+        # timer we register directly with the scheduler's timer queue, and
+        # only spawn a cothread to run the callback when the timer fires.
+        _validate_thread()
+        if self.__pending is not None:
+            self.__pending.cancel()
+            self.__pending = None
+        if self.__timeout is not None:
+            self.__pending = _scheduler.schedule_callback(
+                GetDeadline(self.__timeout), self.__fire)
+
+    def __fire(self):
+        # Called from the scheduler when the pending timeout expires.
+        Spawn(self.__timer, self.__pending, stack_size = self.__stack_size)
+
+    def __timer(self, pending):
+        # If the timer was cancelled or reset after firing but before we got
+        # here then this firing no longer counts.
+        if pending is self.__pending:
+            self.__pending = None
+            if not self.__retrigger:
+                # Unless we're automatically retriggering, any new timeout has
+                # to be specified anew.
+                self.__timeout = None
+            self.__callback()
+
+            if self.__reuse:
+                self.__arm()
             else:
-                self.__fire = True      # We've seen the control event
-
-            running = self.__reuse
-
-        del self.__callback     # Try to avoid reference loops
+                del self.__callback     # Try to avoid reference loops
 
     def cancel(self):
         '''Cancels the timer: the timer is guaranteed not to fire once this
         call has been made.  A cancelled timer cannot be reset.'''
+        _validate_thread()
         self.__reuse = False
-
-        self.__fire = False
-        self.__control.Signal()
+        if self.__pending is not None:
+            self.__pending.cancel()
+            self.__pending = None
+        self.__callback = None      # Try to avoid reference loops
 
     def reset(self, timeout, retrigger=None):
         '''Resets the timer.  The timeout is reset to the given timeout and the
@@ -1080,9 +1255,7 @@ class Timer(object):
         self.__timeout = timeout
         if retrigger is not None:
             self.__retrigger = retrigger
-
-        self.__fire = False
-        self.__control.Signal()
+        self.__arm()
 
 
 def WaitForAll(event_list, timeout = None):
@@ -1164,11 +1337,12 @@ def SleepUntil(deadline):
     '''Sleep until the specified deadline.  Control will always be yielded,
     even if the timeout has already passed.'''
     _validate_thread()
-    _scheduler.wait_until(deadline, None, None)
+    _scheduler.sleep_until(deadline)
 
 def Sleep(timeout):
     '''Sleep until the specified timeout has expired.'''
-    SleepUntil(GetDeadline(timeout))
+    _validate_thread()
+    _scheduler.sleep_until(GetDeadline(timeout))
 
 def Yield(timeout = 0):
     '''Hands control back to the scheduler.  Control is returned either after
@@ -33,6 +33,7 @@ header file db_access.h
 
 import sys
 import ctypes
+import struct
 import numpy
 import datetime
 
@@ -203,30 +204,34 @@ def decode(s):
 # All the following types are used to overlay dbr data returned from channel
 # access or passed into channel access.
 
-def copy_attributes_none(self, other):
-    pass
+# All the dbr_time_xxx types start with the same header of status, severity
+# and raw_stamp, and this can be read in one go, which is rather quicker than
+# going through the ctypes field descriptors one at a time.
+_unpack_time_header = struct.Struct('hhII').unpack_from
 
 def copy_attributes_time(self, other):
-    other.status = self.status
-    other.severity = self.severity
+    status, severity, secs, nsec = _unpack_time_header(self)
+    other.status = status
+    other.severity = severity
 
     # Handling the timestamp is a little awkward.  We provide both a
     # raw_stamp and a timestamp value as there is loss of ns precision in
     # the timestamp value (represented as a double) and the raw_stamp value
     # is awkward for computation.
-    secs = self.raw_stamp.secs + EPICS_epoch
-    nsec = self.raw_stamp.nsec
+    secs += EPICS_epoch
     other.raw_stamp = (secs, nsec)
     # The timestamp is rounded to microseconds, both to avoid confusion
     # (because the ns part is rounded already) and to avoid an excruciating
-    # bug in the .fromtimestamp() function.
-    other.timestamp = round(secs + nsec * 1e-9, 6)
+    # bug in the .fromtimestamp() function.  Rounding in integer arithmetic
+    # is exact and much faster than round().
+    other.timestamp = (secs * 1000000 + (nsec + 500) // 1000) / 1000000
 
 def copy_attributes_ctrl(self, other):
     other.status = self.status
     other.severity = self.severity
 
-    other.units = decode(ctypes.string_at(self.units))
+    # ctypes already returns char array fields as null terminated bytes.
+    other.units = decode(self.units)
     other.upper_disp_limit = self.upper_disp_limit
     other.lower_disp_limit = self.lower_disp_limit
     other.upper_alarm_limit = self.upper_alarm_limit
@@ -236,8 +241,10 @@ def copy_attributes_ctrl(self, other):
     other.upper_ctrl_limit = self.upper_ctrl_limit
     other.lower_ctrl_limit = self.lower_ctrl_limit
 
-    if hasattr(self, 'precision'):
-        other.precision = self.precision
+def copy_attributes_ctrl_precision(self, other):
+    # Only the floating point types carry a display precision.
+    copy_attributes_ctrl(self, other)
+    other.precision = self.precision
 
 # This particular dtype is used for strings, and indeed identity to this
 # value is used to recognise the string type!
@@ -247,43 +254,43 @@ str_dtype = numpy.dtype('S%d' % MAX_STRING_SIZE)
 # Base DBR types
 class dbr_string(ctypes.Structure):
     dtype = str_dtype
-    copy_attributes = copy_attributes_none
+    copy_attributes = None
     _fields_ = [('raw_value', (ctypes.c_byte * MAX_STRING_SIZE) * 1)]
 
 class dbr_short(ctypes.Structure):
     dtype = numpy.int16
     scalar = ca_int
-    copy_attributes = copy_attributes_none
+    copy_attributes = None
     _fields_ = [('raw_value', ctypes.c_int16 * 1)]
 
 class dbr_float(ctypes.Structure):
     dtype = numpy.float32
     scalar = ca_float
-    copy_attributes = copy_attributes_none
+    copy_attributes = None
     _fields_ = [('raw_value', ctypes.c_float * 1)]
 
 class dbr_enum(ctypes.Structure):
     dtype = numpy.uint16
     scalar = ca_int
-    copy_attributes = copy_attributes_none
+    copy_attributes = None
     _fields_ = [('raw_value', ctypes.c_uint16 * 1)]
 
 class dbr_char(ctypes.Structure):
     dtype = numpy.uint8
     scalar = ca_int
-    copy_attributes = copy_attributes_none
+    copy_attributes = None
     _fields_ = [('raw_value', ctypes.c_uint8 * 1)]
 
 class dbr_long(ctypes.Structure):
     dtype = numpy.int32
     scalar = ca_int
-    copy_attributes = copy_attributes_none
+    copy_attributes = None
     _fields_ = [('raw_value', ctypes.c_int32 * 1)]
 
 class dbr_double(ctypes.Structure):
     dtype = numpy.float64
     scalar = ca_float
-    copy_attributes = copy_attributes_none
+    copy_attributes = None
     _fields_ = [('raw_value', ctypes.c_double * 1)]
 
 # DBR types with timestamps.
@@ -385,7 +392,7 @@ class dbr_ctrl_short(ctypes.Structure):
 class dbr_ctrl_float(ctypes.Structure):
     dtype = numpy.float32
     scalar = ca_float
-    copy_attributes = copy_attributes_ctrl
+    copy_attributes = copy_attributes_ctrl_precision
     _fields_ = [
         ('status',              ctypes.c_int16),
         ('severity',            ctypes.c_int16),
@@ -415,9 +422,9 @@ class dbr_ctrl_enum(ctypes.Structure):
     def copy_attributes(self, other):
         other.status = self.status
         other.severity = self.severity
-        other.enums = [
-            decode(ctypes.string_at(s))
-            for s in self.raw_strs[:self.no_str]]
+        # The .value of each char array is already cut at the first null
+        # and limited to MAX_ENUM_STRING_SIZE.
+        other.enums = [decode(s.value) for s in self.raw_strs[:self.no_str]]
 
 class dbr_ctrl_char(ctypes.Structure):
     dtype = numpy.uint8
@@ -459,7 +466,7 @@ class dbr_ctrl_long(ctypes.Structure):
 class dbr_ctrl_double(ctypes.Structure):
     dtype = numpy.float64
     scalar = ca_float
-    copy_attributes = copy_attributes_ctrl
+    copy_attributes = copy_attributes_ctrl_precision
     _fields_ = [
         ('status',              ctypes.c_int16),
         ('severity',            ctypes.c_int16),
@@ -558,6 +565,12 @@ DbrCodeToType = {
     DBR_CLASS_NAME : dbr_string,
 }
 
+# Resolve each dtype once here so that numpy doesn't have to convert the type
+# into a dtype every time we build or check an array.
+for _dbr_type in DbrCodeToType.values():
+    _dbr_type.dtype = numpy.dtype(_dbr_type.dtype)
+del _dbr_type
+
 
 # List of basic DBR types that we can process directly.
 BasicDbrTypes = set([
@@ -604,6 +617,18 @@ FORMAT_RAW = 0
 FORMAT_TIME = 1
 FORMAT_CTRL = 2
 
+# For each format the dbr code to request for each basic dbr type.
+_FormatDbrCodes = {
+    # Use the raw datatype
+    FORMAT_RAW:  dict((t, t) for t in BasicDbrTypes),
+    # Corresponding DBR_TIME_XXXX value
+    FORMAT_TIME: dict((t, t + 14) for t in BasicDbrTypes),
+    # Corresponding DBR_CTRL_XXXX value.  There is no ctrl option for strings,
+    # so in this case provide the richest format we have available.
+    FORMAT_CTRL: dict((t, t + 28) for t in BasicDbrTypes),
+}
+_FormatDbrCodes[FORMAT_CTRL][DBR_STRING] = DBR_TIME_STRING
+
 class InvalidDatatype(Exception):
     '''Invalid datatype requested.'''
 
@@ -640,45 +665,30 @@ def _type_to_dbrcode(datatype, format):
             datatype = _datatype_to_dbr(datatype)
 
     # Now take account of the format
-    if format == FORMAT_RAW:
-        # Use the raw datatype
-        return (datatype, datatype)
-    elif format == FORMAT_TIME:
-        # Return corresponding DBR_TIME_XXXX value
-        return (datatype + 14, datatype)
-    elif format == FORMAT_CTRL:
-        if datatype == DBR_STRING:
-            # There is no ctrl option for strings, so in this case provide
-            # the richest format we have available.
-            return (DBR_TIME_STRING, datatype)
-        else:
-            # Return corresponding DBR_CTRL_XXX value
-            return (datatype + 28, datatype)
-    else:
-        raise InvalidDatatype('Format not recognised')
+    try:
+        return (_FormatDbrCodes[format][datatype], datatype)
+    except (KeyError, TypeError):
+        raise InvalidDatatype('Format not recognised') from None
 
 
 # Helper functions for string arrays used in _convert_str_{str,bytes} below.
-def _make_strings(raw_dbr, count):
-    p_raw_value = ctypes.pointer(raw_dbr.raw_value[0])
-    return [ctypes.string_at(p_raw_value[n]) for n in range(count)]
-
-def _string_array(strings, count, dtypechar):
-    if strings:
-        n = max(len(s) for s in strings)
-    else:
-        # Zero length array of strings!  Very rare, but possible, but numpy
-        # won't allow a dtype of S0, so we need to fake up something
-        n = 1
-    result = ca_array((count,), dtype = '%s%d' % (dtypechar, n))
-    for i, s in enumerate(strings):
-        result[i] = s
-    return result
+def _make_string_array(raw_dbr, count):
+    # Each string is cut at its first null by clearing everything after it,
+    # after which numpy strips the trailing nulls for us.
+    raw_value = (ctypes.c_uint8 * (count * MAX_STRING_SIZE)).from_address(
+        ctypes.addressof(raw_dbr.raw_value))
+    chars = numpy.array(raw_value).reshape((count, MAX_STRING_SIZE))
+    chars[numpy.logical_or.accumulate(chars == 0, axis = 1)] = 0
+    return chars.view(str_dtype)[:, 0].tolist()
+
+def _string_array(strings, dtypechar):
+    # Numpy sizes the string dtype to fit the longest string, and falls back
+    # to a length of 1 for an empty array as S0 is not allowed.
+    return numpy.array(strings, dtype = dtypechar).view(ca_array)
 
 def _string_at(raw_value, count):
-    # Need string_at() twice to ensure string is size limited *and* null
-    # terminated.
-    return ctypes.string_at(ctypes.string_at(raw_value, count))
+    # The string must be size limited *and* null terminated.
+    return ctypes.string_at(raw_value, count).partition(b'\0')[0]
 
 
 # Conversion functions from raw_dbr to specified format.  These all take a
@@ -696,16 +706,16 @@ def _convert_char_bytes(raw_dbr, count):
 
 # Arrays of standard strings.
 def _convert_str_str(raw_dbr, count):
-    return ca_str(decode(_make_strings(raw_dbr, count)[0]))
+    return ca_str(decode(_string_at(raw_dbr.raw_value, MAX_STRING_SIZE)))
 def _convert_str_str_array(raw_dbr, count):
-    strings = [decode(s) for s in _make_strings(raw_dbr, count)]
-    return _string_array(strings, count, 'U')
+    strings = [decode(s) for s in _make_string_array(raw_dbr, count)]
+    return _string_array(strings, 'U')
 
 # Arrays of bytes strings.
 def _convert_str_bytes(raw_dbr, count):
-    return ca_bytes(_make_strings(raw_dbr, count)[0])
+    return ca_bytes(_string_at(raw_dbr.raw_value, MAX_STRING_SIZE))
 def _convert_str_bytes_array(raw_dbr, count):
-    return _string_array(_make_strings(raw_dbr, count), count, 'S')
+    return _string_array(_make_string_array(raw_dbr, count), 'S')
 
 
 # For everything that isn't a string we either return a scalar or a ca_array
@@ -718,9 +728,13 @@ def _convert_other_array(raw_dbr, count):
     # helpful to use a numpy array as a container, because of the support it
     # provides.  It is essential that the dtype correctly matches the memory
     # layout of the raw dbr, and of course that the count is accurate.
-    result = ca_array(shape = (count,), dtype = raw_dbr.dtype)
-    ctypes.memmove(result.ctypes.data, raw_dbr.raw_value, result.nbytes)
-    return result
+    #    Letting numpy take the copy from a buffer over the raw data is
+    # cheaper than a separate ctypes.memmove into a fresh array.
+    raw_value = raw_dbr.raw_value
+    raw_data = (ctypes.c_byte * (count * ctypes.sizeof(raw_value))) \
+        .from_address(ctypes.addressof(raw_value))
+    return numpy.frombuffer(raw_data, dtype = raw_dbr.dtype).copy() \
+        .view(ca_array)
 
 
 def type_to_dbr(channel, datatype, format):
@@ -753,10 +767,10 @@ def type_to_dbr(channel, datatype, format):
     # Determine precisely which conversion from dbr to Python is required: all
     # the options for strings add a lot of complexity, ordinary numeric values
     # are all handled uniformly.
-    if dtype is numpy.uint8 and datatype == DBR_CHAR_STR:
+    if dtype == numpy.uint8 and datatype == DBR_CHAR_STR:
         # Conversion from char array to strings
         convert = _convert_char_str
-    elif dtype is numpy.uint8 and datatype == DBR_CHAR_BYTES:
+    elif dtype == numpy.uint8 and datatype == DBR_CHAR_BYTES:
         # Conversion from char array to bytes strings
         convert = _convert_char_bytes
     else:
@@ -777,6 +791,11 @@ def type_to_dbr(channel, datatype, format):
             convert = convert[1]
 
 
+    # The attribute copying for this dbr type can also be looked up once here
+    # rather than on every update.  Plain dbr types have no attributes to
+    # copy and set this to None.
+    copy_attributes = dbr_type.copy_attributes
+
     # We return this function to perform conversion from dbr to Python value.
     def dbr_to_value(raw_dbr, dbrcode_in, count):
         # If the dbrcode has changed (this really shouldn't happen) then we've
@@ -784,16 +803,16 @@ def type_to_dbr(channel, datatype, format):
         # as this is a pretty poor place to raise an exception.
         assert dbrcode_in == dbrcode, 'Oops, I didn\'t expect CA to do that'
 
-        # Reinterpret the raw_dbr as a pointer to the appropriate structure as
-        # identified by the given dbrcode.  We can then cast the raw_dbr
-        # structure into an instance of this dbr: the data we want is then
-        # available in the .raw_dbr field of this structure.
-        raw_dbr = ctypes.cast(raw_dbr, ctypes.POINTER(dbr_type))[0]
+        # Reinterpret the raw_dbr address as the appropriate structure as
+        # identified by the given dbrcode: the data we want is then available
+        # in the .raw_dbr field of this structure.
+        raw_dbr = dbr_type.from_address(raw_dbr)
         result = convert(raw_dbr, count)
 
         # Finally copy across any attributes together with the pv name and a
         # success indicator.
-        raw_dbr.copy_attributes(result)
+        if copy_attributes is not None:
+            copy_attributes(raw_dbr, result)
         result.name = name
         result.ok = True
         result.element_count = element_count
@@ -816,6 +835,10 @@ def _datatype_to_dtype(datatype):
 def _require_value(value, dtype):
     '''Use numpy to convert value into specified target type ready for transport
     over channel access.'''
+    if isinstance(value, numpy.ndarray) and value.dtype == dtype and \
+            value.ndim == 1 and value.flags.c_contiguous:
+        # Already exactly what we need, no need to go through numpy.require.
+        return value
     result = numpy.require(value, requirements = 'C', dtype = dtype)
     if result.shape == ():
         result.shape = (1,)
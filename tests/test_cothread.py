@@ -2,6 +2,7 @@
 import unittest
 import multiprocessing as mp
 import time
+import threading
 
 # Add cothread onto file and import
 import sys
@@ -40,6 +41,12 @@ class ExceptionTest(unittest.TestCase):
         p.kill()
         p.wait(timeout=10)
 
+    def test_raise_on_wait(self):
+        def fail():
+            raise ValueError('oops')
+        task = cothread.Spawn(fail, raise_on_wait=True)
+        self.assertRaises(ValueError, task.Wait)
+
 
 class EventQueueTest(unittest.TestCase):
     def setUp(self):
@@ -67,6 +74,43 @@ class EventQueueTest(unittest.TestCase):
         self.assertEqual(list(self.o), [4, "boo", {}])
 
 
+class SleepTest(unittest.TestCase):
+    def test_sleep_zero_yields(self):
+        l = []
+        cothread.Spawn(l.append, 1)
+        self.assertEqual(l, [])
+        cothread.Sleep(0)
+        self.assertEqual(l, [1])
+
+    def test_sleep_until_past(self):
+        l = []
+        cothread.Spawn(l.append, 1)
+        cothread.SleepUntil(time.time() - 1)
+        self.assertEqual(l, [1])
+
+    def test_yield_zero(self):
+        l = []
+        cothread.Spawn(l.append, 1)
+        cothread.Yield()
+        self.assertEqual(l, [1])
+
+    def test_expired_wait_order(self):
+        # Expired waits are woken in deadline order, so a wait which timed
+        # out before a Yield(0) or Sleep(0) completes before it returns.
+        for wait in [cothread.Yield, cothread.Sleep]:
+            l = []
+            def waiter():
+                try:
+                    cothread.Event().Wait(0)
+                except cothread.Timedout:
+                    l.append(1)
+            cothread.Spawn(waiter)
+            wait(0)
+            self.assertEqual(l, [])
+            wait(0)
+            self.assertEqual(l, [1])
+
+
 class TimerTest(unittest.TestCase):
     def test_oneshot(self):
         l = []
@@ -103,6 +147,34 @@ class TimerTest(unittest.TestCase):
         cothread.Sleep(0.15)
         self.assertEqual(l, [1, 3, 5])
 
+    def test_cancel(self):
+        l = []
+        t = cothread.Timer(0.05, lambda: l.append(1))
+        t.cancel()
+        cothread.Sleep(0.1)
+        self.assertEqual(l, [])
+
+    def test_no_idle_cothread(self):
+        count = len(cothread.Spawn.Cothreads)
+        t = cothread.Timer(10, lambda: None, reuse=True)
+        self.assertEqual(len(cothread.Spawn.Cothreads), count)
+        t.cancel()
+
+    def test_other_thread(self):
+        t = cothread.Timer(10, lambda: None)
+        errors = []
+        def other():
+            for call in [lambda: cothread.Timer(10, lambda: None), t.cancel]:
+                try:
+                    call()
+                except AssertionError:
+                    errors.append(call)
+        thread = threading.Thread(target = other)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 2)
+        t.cancel()
+
 
 
 class RLockTest(unittest.TestCase):